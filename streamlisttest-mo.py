@@ -3,6 +3,8 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+import os
+import tempfile
 
 # -------------------------------------------------------
 # 1) PAGE CONFIG & GLOBAL CSS
@@ -88,12 +90,47 @@ h1 {
 }
 </style>
 """
+# _FLOW_CSS is a plain module constant (no f-string), so nothing is rebuilt per rerun.
+# It still has to be emitted on EVERY run: Streamlit removes any element the current
+# run doesn't re-send, so gating this on st.session_state would drop the styling
+# after the first widget interaction.
 st.markdown(_FLOW_CSS, unsafe_allow_html=True)
 
 
 # -------------------------------------------------------
 # 2) LOAD & PREPARE DATA
 # -------------------------------------------------------
+# Low-cardinality columns we filter/group on; stored as pandas categoricals
+CATEGORICAL_COLS = ["Classification", "Metro", "weight"]
+
+
+def _save_parquet(df: pd.DataFrame, parquet_path: str) -> None:
+    """
+    Writes `df` to a temporary file next to `parquet_path`, then renames it into place,
+    so a killed process or two racing cold starts never leave a truncated copy behind.
+    Skipped silently if the folder is read-only.
+    """
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(parquet_path) or ".", suffix=".parquet.tmp"
+        )
+        os.close(fd)
+        df.to_parquet(tmp_path, index=False, compression="zstd")
+        os.replace(tmp_path, parquet_path)
+    except OSError:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _format_pct(values: np.ndarray) -> np.ndarray:
+    """
+    Formats an array of percentages (0–100) as "92.6%" strings, with "—" for NaN
+    (e.g. a wrestler with zero matches). One np.char pass over the whole array.
+    """
+    return np.where(np.isnan(values), "—", np.char.mod("%.1f%%", values))
+
+
 @st.cache_data  # Cache so that re‐runs are faster
 def load_data(path: str) -> pd.DataFrame:
     """
@@ -102,19 +139,43 @@ def load_data(path: str) -> pd.DataFrame:
     - Creates a new "Classification" column based on the existing "leagues" column.
       If "leagues" contains things like "Class 1A, Zinc County", we split off at the comma
       so we just get "Class 1A".
+    - Adds a numeric "Bonus_Pct" plus pre-formatted "Win_Pct_Str" / "Bonus_Pt_Str"
+      display columns, so the per-weight tables only have to select them.
+    - Downcasts the numeric columns (int8/int16/float32).
+    - Converts Classification, Metro and weight to categorical dtype.
+    The cleaned frame is also saved as a .parquet file next to the CSV, and reused
+    on later cold starts as long as it is newer than both the CSV and this script.
     """
-    df = pd.read_csv(path)
+    # 2.0) Fast path: reuse the cleaned Parquet copy if it is still up to date
+    parquet_path = os.path.splitext(path)[0] + ".parquet"
+    newest_source = max(os.path.getmtime(path), os.path.getmtime(__file__))
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= newest_source:
+        try:
+            df = pd.read_parquet(parquet_path)
+        except (OSError, ValueError):
+            pass  # Unreadable copy: rebuild from the CSV below, which overwrites it
+        else:
+            # Parquet keeps string categoricals but not integer ones (weight), so re-apply
+            return df.astype({c: "category" for c in CATEGORICAL_COLS if c in df.columns})
+
+    # Arrow-backed columns: names/metros become contiguous string[pyarrow] buffers
+    # instead of arrays of Python object pointers
+    df = pd.read_csv(path, engine="pyarrow", dtype_backend="pyarrow")
 
     # 2.1) Standardize column names (strip whitespace)
     df.columns = [c.strip() for c in df.columns]
 
     # 2.2) Create a unified "Classification" column from the existing "leagues" column
     if "leagues" in df.columns:
-        # Convert to string just in case, then split off any comma‐suffix
+        # Convert to a nullable string just in case (an all-blank column is read as
+        # Arrow "null"), then split off any comma‐suffix (vectorized .str ops, no
+        # per-row lambda). Blank leagues stay missing, so they never show in the dropdown.
         df["Classification"] = (
             df["leagues"]
-            .astype(str)
-            .apply(lambda x: x.split(",")[0].strip())
+            .astype("string")
+            .str.split(",", n=1)
+            .str[0]
+            .str.strip()
         )
     else:
         # If your CSV truly has no "leagues" column, we leave Classification blank,
@@ -124,6 +185,44 @@ def load_data(path: str) -> pd.DataFrame:
     # 2.3) Drop the original "leagues" column so it doesn’t clutter the table later on
     df = df.drop(columns=["leagues"], errors="ignore")
 
+    # 2.4) Win % and Bonus Pt % = (Pins + Tech_Falls + Major_Decisions) / (Wins + Losses),
+    #      computed and formatted once for the whole file
+    #      (float64 with NaN, so a blank count can't break the nullable Arrow columns;
+    #      missing and zero-match rows both end up as "—")
+    wins = df["Wins"].to_numpy(dtype=np.float64, na_value=np.nan)
+    total_matches = wins + df["Losses"].to_numpy(dtype=np.float64, na_value=np.nan)
+    bonus_pts = (
+        df[["Pins", "Tech_Falls", "Major_Decisions"]]
+        .to_numpy(dtype=np.float64, na_value=np.nan)
+        .sum(axis=1)
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if "Win_Pct" not in df.columns:
+            # If you only have “Wins” & “Losses,” compute Win_Pct on the fly
+            df["Win_Pct"] = np.where(total_matches == 0, np.nan, wins / total_matches)
+        df["Bonus_Pct"] = np.where(total_matches == 0, np.nan, bonus_pts / total_matches)
+    win_pct = df["Win_Pct"].to_numpy(dtype=np.float64, na_value=np.nan)
+    df["Win_Pct_Str"] = _format_pct(win_pct * 100)
+    df["Bonus_Pt_Str"] = _format_pct(df["Bonus_Pct"].to_numpy() * 100)
+
+    # 2.5) Downcast the small counts (int8/int16) and percentages (float32) to cut
+    #      the bytes every filter/sort has to move. Done after 2.4 so those sums
+    #      can't overflow a narrow integer type.
+    for col in ["Wins", "Losses", "Pins", "Tech_Falls", "Major_Decisions", "grade", "weight"]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+    df["Win_Pct"] = df["Win_Pct"].astype(np.float32)
+    df["Bonus_Pct"] = df["Bonus_Pct"].astype(np.float32)
+
+    # 2.6) Store the low-cardinality filter/group columns as categoricals, so the
+    #      equality filters and the per-weight groupby compare small integer codes
+    for col in CATEGORICAL_COLS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+
+    # 2.7) Save the cleaned frame for the next cold start
+    _save_parquet(df, parquet_path)
+
     return df
 
 
@@ -171,29 +270,41 @@ st.markdown(
 )
 
 # --- Build lists for each filter --- #
+@st.cache_data  # The option lists only depend on the CSV, so compute them once
+def get_filter_options(path: str) -> tuple:
+    """
+    Returns (all_leagues, all_metros, all_grades) for the three dropdowns,
+    each starting with "(All)".
+    """
+    df = load_data(path)
+
+    # 3a) Classification (League) dropdown
+    if "Classification" in df.columns:
+        unique_leagues = sorted(df["Classification"].dropna().unique().tolist())
+        all_leagues = ["(All)"] + unique_leagues
+    else:
+        all_leagues = ["(All)"]
+
+    # 3b) Metro dropdown
+    if "Metro" in df.columns:
+        unique_metros = sorted(df["Metro"].dropna().unique().tolist())
+        all_metros = ["(All)"] + unique_metros
+    else:
+        all_metros = ["(All)"]
+
+    # 3c) Grade dropdown (show only 9–12 in numeric order, no “.0”)
+    if "grade" in df.columns:
+        grade_vals = sorted(df["grade"].dropna().unique().astype(int).tolist())
+        # Only keep 9,10,11,12 if present
+        grade_vals = [g for g in grade_vals if g in [9, 10, 11, 12]]
+        all_grades = ["(All)"] + [str(g) for g in grade_vals]
+    else:
+        all_grades = ["(All)"]
+
+    return all_leagues, all_metros, all_grades
+
 
-# 3a) Classification (League) dropdown
-if "Classification" in df_all.columns:
-    unique_leagues = sorted(df_all["Classification"].dropna().unique().tolist())
-    all_leagues = ["(All)"] + unique_leagues
-else:
-    all_leagues = ["(All)"]
-
-# 3b) Metro dropdown
-if "Metro" in df_all.columns:
-    unique_metros = sorted(df_all["Metro"].dropna().unique().tolist())
-    all_metros = ["(All)"] + unique_metros
-else:
-    all_metros = ["(All)"]
-
-# 3c) Grade dropdown (show only 9–12 in numeric order, no “.0”)
-if "grade" in df_all.columns:
-    grade_vals = sorted(df_all["grade"].dropna().unique().astype(int).tolist())
-    # Only keep 9,10,11,12 if present
-    grade_vals = [g for g in grade_vals if g in [9, 10, 11, 12]]
-    all_grades = ["(All)"] + [str(g) for g in grade_vals]
-else:
-    all_grades = ["(All)"]
+all_leagues, all_metros, all_grades = get_filter_options(DATA_PATH)
 
 # --- Place the three selectboxes side by side --- #
 col1, col2, col3 = st.columns([3, 3, 2], gap="large")
@@ -225,140 +336,120 @@ st.markdown("---")  # horizontal divider
 # -------------------------------------------------------
 # 4) APPLY FILTERS
 # -------------------------------------------------------
-dff = df_all.copy()
+def apply_filters(df: pd.DataFrame, league: str, metro: str, grade: str) -> pd.DataFrame:
+    """
+    Returns the subset of `df` matching the three dropdown selections.
+    Any selection left at “(All)” is skipped.
+    """
+    clauses = []
 
-# 4a) Filter by Classification (if not “(All)”)
-if selected_league != "(All)" and "Classification" in dff.columns:
-    dff = dff[dff["Classification"] == selected_league]
+    # 4a) Filter by Classification (if not “(All)”)
+    if league != "(All)" and "Classification" in df.columns:
+        clauses.append("Classification == @league")
 
-# 4b) Filter by Metro (if not “(All)”)
-if selected_metro != "(All)" and "Metro" in dff.columns:
-    dff = dff[dff["Metro"] == selected_metro]
+    # 4b) Filter by Metro (if not “(All)”)
+    if metro != "(All)" and "Metro" in df.columns:
+        clauses.append("Metro == @metro")
 
-# 4c) Filter by Grade (if not “(All)”)
-if selected_grade != "(All)" and "grade" in dff.columns:
-    try:
-        grade_int = int(selected_grade)
-        dff = dff[dff["grade"] == grade_int]
-    except ValueError:
-        pass
+    # 4c) Filter by Grade (if not “(All)”)
+    if grade != "(All)" and "grade" in df.columns:
+        try:
+            grade_int = int(grade)
+            clauses.append("grade == @grade_int")
+        except ValueError:
+            pass
+
+    # 4d) One fused query (single mask + single gather) instead of three slices
+    if not clauses:
+        return df
+    return df.query(" and ".join(clauses))
 
 
 # -------------------------------------------------------
-# 5) LOOP OVER WEIGHT CLASSES & DISPLAY TABLES
+# 5) BUILD PER-WEIGHT TABLES & DISPLAY THEM
 # -------------------------------------------------------
-if "weight" not in dff.columns:
-    st.error("❗️ Your data must include a column named “weight” (the weight class).")
-    st.stop()
+# Columns shown in each weight table (after "Rank"), in order, mapped to their headers
+DISPLAY_COLUMNS = {
+    "wrestler_name": "Wrestler Name",
+    "team_name": "Team Name",
+    "grade": "Grade",
+    "Wins": "Wins",
+    "Losses": "Losses",
+    "Win_Pct_Str": "Win %",
+    "Bonus_Pt_Str": "Bonus Pt %",
+    "Pins": "Pins",
+    "Tech_Falls": "Tech Falls",
+    "Major_Decisions": "Major Decisions",
+}
 
-all_weights = sorted(dff["weight"].dropna().unique().tolist())
 
-for w in all_weights:
-    df_w = dff[dff["weight"] == w].copy()
-    if df_w.empty:
-        continue
+# cache_resource: one process-wide copy per filter combo, shared by every visitor and
+# handed back without the pickle round-trip cache_data does on each hit. Safe because
+# nothing downstream mutates these tables; max_entries bounds the filter cross-product.
+@st.cache_resource(max_entries=64)
+def build_display_tables(league: str, metro: str, grade: str) -> list:
+    """
+    Filters the data, then splits it into weight classes in a single groupby pass.
+    Returns [(expander_label, df_display), ...] in ascending weight order, where the
+    label reads "106 | Top Wrestler (Team)" and df_display is that weight's table.
+    """
+    dff = apply_filters(load_data(DATA_PATH), league, metro, grade)
+    if dff.empty:
+        return []
 
     # ──────────────────────────────────────────────────────────────────
-    # A) Re‐compute a DYNAMIC RANK (1,2,3,…) on the filtered subset
+    # A) Sort ONCE by weight, then by the original “rank” ascending (or, if there
+    #    is no “rank” column, by Win_Pct descending). Every weight group below
+    #    comes out already in display order, and in ascending weight order.
     # ──────────────────────────────────────────────────────────────────
-    if "rank" in df_w.columns:
-        # Sort by the original “rank” ascending
-        df_w = df_w.sort_values(by="rank", ascending=True).reset_index(drop=True)
+    if "rank" in dff.columns:
+        dff = dff.sort_values(by=["weight", "rank"], ascending=[True, True], kind="stable")
     else:
-        # If no original “rank” column, sort by Win_Pct descending
-        df_w = df_w.sort_values(by="Win_Pct", ascending=False).reset_index(drop=True)
+        dff = dff.sort_values(by=["weight", "Win_Pct"], ascending=[True, False], kind="stable")
+
+    # B) Re‐compute a DYNAMIC RANK (1,2,3,…) on the filtered subset for every weight
+    #    at once: the frame is sorted, so it's just a running count within each weight
+    dynamic_rank = dff.groupby("weight", sort=False, observed=True).cumcount().to_numpy(np.int32) + 1
+    dff = dff.assign(dynamic_rank=dynamic_rank)
+
+    tables = []
+    for w, df_w in dff.groupby("weight", sort=False, observed=True):
+        # Figure out who is #1 in this weight for the expander label (the group is
+        # already sorted, so that's simply the first row):
+        top_row = df_w.iloc[0]
+        expander_label = f"{w} | {top_row['wrestler_name']} ({top_row['team_name']})"
+
+        # C) Build the display table in one go: the shown columns already in display
+        #    order and under their display names — no copy/drop/reorder/rename passes
+        df_display = pd.DataFrame(
+            {
+                "Rank": df_w["dynamic_rank"].to_numpy(),
+                **{
+                    header: df_w[col].to_numpy()
+                    for col, header in DISPLAY_COLUMNS.items()
+                    if col in df_w.columns
+                },
+            }
+        )
 
-    # Now assign dynamic_rank = 1..N
-    df_w["dynamic_rank"] = df_w.index + 1
+        tables.append((expander_label, df_display))
 
-    # Figure out who is #1 in this weight for the expander label:
-    top_row = df_w[df_w["dynamic_rank"] == 1].iloc[0]
-    top_name = top_row["wrestler_name"]
-    top_team = top_row["team_name"]
-    expander_label = f"{w} | {top_name} ({top_team})"
-    # ──────────────────────────────────────────────────────────────────
+    return tables
 
-    with st.expander(expander_label, expanded=False):
-        # 5.1) Start building a display copy
-        df_display = df_w.copy()
-
-        # 5.2) Drop columns we do NOT want to show
-        drop_cols = [
-            "Classification",
-            "Metro",
-            "rank",       # original static rank
-            "Win_Pct",    # we’ll re‐format this as a percentage string
-        ]
-        df_display = df_display.drop(columns=drop_cols, errors="ignore")
-
-        # 5.3) Reorder & calculate new columns
-
-        # ----- Win % as a formatted string ----- #
-        if "Win_Pct" in df_w.columns:
-            df_display["Win %"] = df_w["Win_Pct"].apply(
-                lambda x: f"{x * 100:.1f}%" if pd.notnull(x) else "—"
-            )
-        else:
-            # If you only have “Wins” & “Losses,” compute Win_Pct on the fly
-            def _calc_win_pct(r):
-                total = r["Wins"] + r["Losses"]
-                if total == 0:
-                    return "—"
-                return f"{r['Wins'] / total * 100:.1f}%"
-            df_display["Win %"] = df_w.apply(_calc_win_pct, axis=1)
-
-        # ----- Bonus Pt % = (Pins + Tech_Falls + Major_Decisions) / (Wins + Losses) ----- #
-        def calc_bonus_pct(row):
-            total_matches = row["Wins"] + row["Losses"]
-            if total_matches == 0:
-                return "—"
-            bonus_pts = row["Pins"] + row["Tech_Falls"] + row["Major_Decisions"]
-            return f"{bonus_pts / total_matches * 100:.1f}%"
-
-        df_display["Bonus Pt %"] = df_w.apply(calc_bonus_pct, axis=1)
-
-        # 5.4) Decide on final column order:
-        desired_order = [
-            "dynamic_rank",
-            "wrestler_name",
-            "team_name",
-            "grade",
-            "Wins",
-            "Losses",
-            "Win %",
-            "Bonus Pt %",
-            "Pins",
-            "Tech_Falls",
-            "Major_Decisions",
-        ]
-        cols_to_show = [c for c in desired_order if c in df_display.columns]
-        df_display = df_display[cols_to_show]
-
-        # 5.5) Rename for nicer column headers
-        df_display = df_display.rename(
-            columns={
-                "dynamic_rank": "Rank",
-                "wrestler_name": "Wrestler Name",
-                "team_name": "Team Name",
-                "grade": "Grade",
-                "Wins": "Wins",
-                "Losses": "Losses",
-                "Win %": "Win %",
-                "Bonus Pt %": "Bonus Pt %",
-                "Pins": "Pins",
-                "Tech_Falls": "Tech Falls",
-                "Major_Decisions": "Major Decisions",
-            }
-        )
 
-        # 5.6) Convert Grade to an integer (drop any “.0”)
-        if "Grade" in df_display.columns:
-            df_display["Grade"] = df_display["Grade"].astype(int)
+if "weight" not in df_all.columns:
+    st.error("❗️ Your data must include a column named “weight” (the weight class).")
+    st.stop()
 
-        # 5.7) Reset pandas index so we don’t see “0,1,2…” on the far left
-        df_display = df_display.reset_index(drop=True)
+weight_tables = build_display_tables(selected_league, selected_metro, selected_grade)
+if not weight_tables:
+    st.info("No wrestlers match these filters.")
 
-        # 5.8) Finally, show it with st.dataframe (hide_index=True removes pandas index column)
+# 5.4) Render one expander per weight — no pandas work here, just the cached tables.
+#      st.dataframe sends each table as compact Arrow data and keeps sorting/search.
+for expander_label, df_display in weight_tables:
+    with st.expander(expander_label, expanded=False):
+        # hide_index=True removes the pandas index column
         st.dataframe(df_display, use_container_width=True, hide_index=True)
 
 
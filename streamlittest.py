@@ -4,237 +4,150 @@
 
 import streamlit as st
 import pandas as pd
-import base64
+import numpy as np
 import os
+import tempfile
 
 # -------------------------------------------------------
-# 1) PAGE CONFIG & HELPER: LOAD BASE64 FONTS
+# 1) PAGE CONFIG
 # -------------------------------------------------------
 st.set_page_config(
     page_title="Iowa Wrestling Leaderboard",
     layout="wide",
 )
 
-def _load_font_base64(filename: str) -> str:
-    """
-    Helper: read a local .ttf file in the same folder, return its Base64 string.
-    """
-    with open(filename, "rb") as f:
-        data = f.read()
-    return base64.b64encode(data).decode()
-
-# Attempt to load the two font files (Regular + Bold)
-BASE_DIR = os.path.dirname(__file__)  # directory where this script lives
-REG_PATH  = os.path.join(BASE_DIR, "Fontfabric - UniNeueRegular.ttf")
-BOLD_PATH = os.path.join(BASE_DIR, "Fontfabric - UniNeueBold.ttf")
-
-# If these fail, you’ll see a FileNotFoundError
-base64_reg  = _load_font_base64(REG_PATH)
-base64_bold = _load_font_base64(BOLD_PATH)
-
-
 # -------------------------------------------------------
-# 2) INJECT GLOBAL CSS (Uni Neue + Black/Red Palette + Compact Table)
+# 2) LINK GLOBAL CSS (Uni Neue + Black/Red Palette + Compact Table)
 # -------------------------------------------------------
-_FLOW_CSS = f"""
-<style>
-
-/* ─────────────────────────────────────────────────────────────────────
-   A) EMBED UNI NEUE VIA BASE64
-   ───────────────────────────────────────────────────────────────────── */
-@font-face {{
-  font-family: 'Uni Neue';
-  src: url("data:font/ttf;base64,{base64_reg}") format("truetype");
-  font-weight: 400;
-  font-style: normal;
-}}
-@font-face {{
-  font-family: 'Uni Neue';
-  src: url("data:font/ttf;base64,{base64_bold}") format("truetype");
-  font-weight: 700;
-  font-style: normal;
-}}
-
-/* ─────────────────────────────────────────────────────────────────────
-   B) FORCE ALL TEXT → UNI NEUE + VERY DARK CHARCOAL (#1A1A1A)
-   ───────────────────────────────────────────────────────────────────── */
-html, body, [class*="css"], .stApp {{
-  font-family: 'Uni Neue', sans-serif !important;
-  color: #1A1A1A !important;
-  margin: 0;
-  padding: 0;
-  background-color: #FFFFFF !important;
-}}
-a, button, label, span, div {{
-  color: #1A1A1A !important;
-}}
-
-/* Links fallback if Uni Neue fails */
-@media screen {{
-  body {{
-    font-family: 'Uni Neue', sans-serif !important;
-  }}
-}}
-
-/* ─────────────────────────────────────────────────────────────────────
-   C) MAIN HEADER + SUBHEADER
-   ───────────────────────────────────────────────────────────────────── */
-h1 {{
-  font-size: 2.5rem !important;
-  font-weight: 700 !important;
-  margin-bottom: 0.2rem;
-  color: #1A1A1A !important;
-}}
-.subheader {{
-  font-size: 1rem !important;
-  color: #4F4F4F !important;
-  margin-top: -0.5rem;
-  margin-bottom: 1.25rem;
-}}
-
-/* ─────────────────────────────────────────────────────────────────────
-   D) TABLE / DATAFRAME STYLING (COMPACT + BLACK HEADERS + LIGHT GRAY BG)
-   ───────────────────────────────────────────────────────────────────── */
-/* Make the DataFrame container responsive */
-.stDataFrame > div {{
-  overflow-x: auto !important;
-}}
-
-/* Shrink padding + font-size for header cells */
-.stDataFrame table th {{
-  background-color: #F1F1F1 !important;
-  color: #1A1A1A !important;
-  font-weight: 600 !important;
-  text-align: left !important;
-  padding: 0.3rem 0.6rem !important;
-  font-size: 0.85rem !important;
-}}
-
-/* Shrink padding + font-size for data cells */
-.stDataFrame table td {{
-  padding: 0.25rem 0.5rem !important;
-  font-size: 0.85rem !important;
-  color: #1A1A1A !important;
-}}
-
-/* Hide pandas index column entirely */
-.css-k1vhr4.e1tzin5v0 {{
-  display: none !important;
-}}
-
-/* Light divider lines */
-.stDataFrame table, 
-.stDataFrame table th, 
-.stDataFrame table td {{
-  border-color: #E0E0E0 !important;
-}}
-
-/* ─────────────────────────────────────────────────────────────────────
-   E) SELECTBOX / RADIO / BUTTON STYLING (RED ACCENTS #E63946)
-   ───────────────────────────────────────────────────────────────────── */
-/* Selectbox background + border */
-[data-testid="stSelectbox"] .css-1wrcr25 {{
-  background-color: #F7F7F7 !important;
-  color: #1A1A1A !important;
-  border-radius: 0.5rem !important;
-  border: 1px solid #D9D9D9 !important;
-  padding: 0.5rem 0.75rem !important;
-  font-size: 0.95rem !important;
-}}
-/* Focused Selectbox → red border */
-[data-testid="stSelectbox"] .css-1wrcr25:focus-within {{
-  border: 1px solid #E63946 !important;
-  box-shadow: none !important;
-}}
-
-/* Radio (selected / hover) → red accent */
-.stRadio button:checked + div, 
-.stRadio button:focus + div,
-.stRadio div:hover {{
-  border-color: #E63946 !important;
-  color: #E63946 !important;
-}}
-
-/* Buttons → red background, white text */
-.stButton button {{
-  background-color: #E63946 !important;
-  color: #FFFFFF !important;
-  border: none !important;
-  font-weight: 600 !important;
-  border-radius: 0.5rem !important;
-  padding: 0.5rem 1rem !important;
-  font-size: 0.95rem !important;
-}}
-.stButton button:hover {{
-  background-color: #D12F3F !important; /* slightly darker red */
-}}
-
-/* ─────────────────────────────────────────────────────────────────────
-   F) TABS: ACTIVE TAB RED + DARK TEXT, INACTIVE TAB GRAY
-   ───────────────────────────────────────────────────────────────────── */
-.css-1avcm0n.e1fqkh3o {{  /* Tab container bottom border */
-  border-bottom: 1px solid #E0E0E0 !important;
-}}
-.css-1avcm0n.e1fqkh3o button {{
-  font-family: 'Uni Neue', sans-serif !important;
-  font-weight: 600 !important;
-  color: #4F4F4F !important; /* inactive = medium gray */
-  background-color: transparent !important;
-  border: none !important;
-  padding: 0.6rem 1.2rem !important;
-}}
-.css-1avcm0n.e1fqkh3o button[aria-selected="true"] {{
-  color: #E63946 !important;       /* active = Flow red */
-  border-bottom: 3px solid #E63946 !important;
-}}
-.css-1avcm0n.e1fqkh3o button:hover {{
-  color: #E63946 !important;
-}}
-
-/* ─────────────────────────────────────────────────────────────────────
-   G) COMPACT / MOBILE ADJUSTMENTS (≤768px)
-   ───────────────────────────────────────────────────────────────────── */
-@media (max-width: 768px) {{
-  h1 {{
-    font-size: 2rem !important;
-    margin-bottom: 0.15rem;
-  }}
-  .subheader {{
-    font-size: 0.9rem !important;
-    margin-top: -0.4rem;
-    margin-bottom: 1rem;
-  }}
-  [data-testid="stSelectbox"] .css-1wrcr25 {{
-    padding: 0.3rem 0.5rem !important;
-    font-size: 0.85rem !important;
-  }}
-  .stApp {{
-    padding: 0.5rem !important;
-  }}
-}}
-</style>
-"""
-
-st.markdown(_FLOW_CSS, unsafe_allow_html=True)
+# The stylesheet and fonts live in ./static and are served by Streamlit's static
+# file serving (enabled in .streamlit/config.toml), so the browser downloads and
+# caches them once instead of receiving the CSS + Base64 fonts on every rerun.
+# They stay out of a [theme] in config.toml, which would also restyle the Missouri
+# app in this folder. The links are emitted together with the page header in section 4.
+_FLOW_CSS = (
+    '<link rel="preload" href="app/static/UniNeueRegular.latin.woff2" as="font" type="font/woff2" crossorigin>'
+    '<link rel="preload" href="app/static/UniNeueBold.latin.woff2" as="font" type="font/woff2" crossorigin>'
+    '<link rel="stylesheet" href="app/static/flow.css">'
+)
 
 
 # -------------------------------------------------------
 # 3) LOAD & PREPARE DATA
 # -------------------------------------------------------
-@st.cache_data
+# Columns the app actually reads, and compact dtypes for the numeric ones
+USECOLS = [
+    "weight", "wrestler_name", "team_name", "grade", "Metro", "leagues", "global_score",
+    "rank", "Wins", "Losses", "Win_Pct", "Pins", "Tech_Falls", "Major_Decisions",
+]
+DTYPES = {
+    "weight": "Int16",
+    "grade": "Int8",
+    "rank": "Int32",
+    "Wins": "Int16",
+    "Losses": "Int16",
+    "Pins": "Int16",
+    "Tech_Falls": "Int16",
+    "Major_Decisions": "Int16",
+}
+# Low-cardinality columns the filters compare by equality
+CATEGORICAL_COLS = ["Classification", "Metro", "weight"]
+# High-school grades offered in the Grade filter (the tables still show any grade)
+FILTER_GRADES = (9, 10, 11, 12)
+
+
+def _to_categoricals(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts CATEGORICAL_COLS to categoricals (weight ordered by value, so its
+    categories double as the sorted radio options).
+    """
+    df = df.astype({c: "category" for c in CATEGORICAL_COLS if c in df.columns})
+    if "weight" in df.columns:
+        df["weight"] = df["weight"].cat.as_ordered()
+    return df
+
+
+def _save_parquet(df: pd.DataFrame, parquet_path: str) -> None:
+    """
+    Writes `df` to a temporary file next to `parquet_path`, then renames it into place,
+    so a killed process or two racing cold starts never leave a truncated copy behind.
+    Skipped silently if the folder is read-only.
+    """
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(parquet_path) or ".", suffix=".parquet.tmp"
+        )
+        os.close(fd)
+        df.to_parquet(tmp_path, index=False, compression="zstd")
+        os.replace(tmp_path, parquet_path)
+    except OSError:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+@st.cache_resource  # One shared frame: cache hits skip st.cache_data's unpickle/copy
 def load_data(path: str) -> pd.DataFrame:
     """
     Loads the wrestling CSV and does initial cleanup:
+    - Parses only the USECOLS present in the file, with DTYPES, via the pyarrow engine.
     - Strips whitespace from column names.
     - Builds a "Classification" column from "leagues" (e.g. "Class 1A, Zinc County" → "Class 1A").
+    - Adds a numeric "Bonus_Pct" (and "Win_Pct", if the file lacks it) as 0–1 fractions.
+    - Stores CATEGORICAL_COLS as categoricals, so filter masks compare small integer
+      codes and the dropdowns read their sorted categories. grade stays a plain Int8.
+    - Sorts the rows by global_score (descending, stable), i.e. in P4P order.
+    The cleaned frame is also saved as a .parquet file next to the CSV, and reused
+    on later cold starts as long as it is newer than both the CSV and this script.
+    Every caller shares the returned frame, so it must be treated as read-only.
     """
-    df = pd.read_csv(path)
+    parquet_path = os.path.splitext(path)[0] + ".parquet"
+    newest_source = max(os.path.getmtime(path), os.path.getmtime(__file__))
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= newest_source:
+        try:
+            df = pd.read_parquet(parquet_path)
+        except (OSError, ValueError):
+            pass  # Unreadable copy: rebuild from the CSV below, which overwrites it
+        else:
+            # Parquet keeps string categoricals but not integer ones (weight), so re-apply
+            return _to_categoricals(df)
+
+    header = pd.read_csv(path, nrows=0).columns
+    df = pd.read_csv(
+        path,
+        engine="pyarrow",
+        dtype_backend="pyarrow",
+        usecols=[c for c in header if c.strip() in USECOLS],
+        dtype=DTYPES,
+    )
     df.columns = [c.strip() for c in df.columns]
     if "leagues" in df.columns:
-        df["Classification"] = df["leagues"].astype(str).apply(lambda x: x.split(",")[0].strip())
+        leagues = df["leagues"].astype("string")
+        df["Classification"] = leagues.str.split(",", n=1, regex=False).str[0].str.strip()
     else:
         df["Classification"] = ""
     df = df.drop(columns=["leagues"], errors="ignore")
+
+    # Win % and Bonus Pt % = (Pins + Tech_Falls + Major_Decisions) / (Wins + Losses),
+    # computed once for the whole file (NaN for wrestlers with no matches)
+    wins = df["Wins"].to_numpy(dtype=np.float64, na_value=np.nan)
+    total_matches = wins + df["Losses"].to_numpy(dtype=np.float64, na_value=np.nan)
+    bonus_pts = (
+        df[["Pins", "Tech_Falls", "Major_Decisions"]]
+        .to_numpy(dtype=np.float64, na_value=np.nan)
+        .sum(axis=1)
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if "Win_Pct" not in df.columns:
+            df["Win_Pct"] = np.where(total_matches > 0, wins / total_matches, np.nan)
+        df["Bonus_Pct"] = np.where(total_matches > 0, bonus_pts / total_matches, np.nan)
+
+    df = _to_categoricals(df)
+
+    # Store rows in P4P order once; filtering keeps it, so the P4P tab never re-sorts
+    df = df.sort_values("global_score", ascending=False, kind="stable", ignore_index=True)
+
+    # Save the cleaned frame for the next cold start
+    _save_parquet(df, parquet_path)
     return df
 
 
@@ -255,37 +168,50 @@ except FileNotFoundError:
 # -------------------------------------------------------
 # 4) PAGE HEADER + FILTERS
 # -------------------------------------------------------
-st.markdown("## 🏆 Iowa Wrestling Leaderboard")
-st.markdown(
-    '<div class="subheader">'
+# Stylesheet links + title + subheader go out as one markdown element
+_PAGE_HEADER = (
+    _FLOW_CSS
+    + "\n\n## 🏆 Iowa Wrestling Leaderboard\n\n"
+    + '<div class="subheader">'
     "Use the filters below to narrow by "
     "<span style='font-weight:600;'>Classification (League)</span>, "
     "<span style='font-weight:600;'>Metro</span>, or "
     "<span style='font-weight:600;'>Grade</span>, "
     "then toggle between the “Pound-for-Pound” tab and the “By Weight Class” tab below."
-    "</div>",
-    unsafe_allow_html=True,
+    "</div>"
 )
+st.markdown(_PAGE_HEADER, unsafe_allow_html=True)
 
 # --- Build lists for each filter --- #
-if "Classification" in df_all.columns:
-    unique_leagues = sorted(df_all["Classification"].dropna().unique().tolist())
-    all_leagues = ["(All)"] + unique_leagues
-else:
-    all_leagues = ["(All)"]
-
-if "Metro" in df_all.columns:
-    unique_metros = sorted(df_all["Metro"].dropna().unique().tolist())
-    all_metros = ["(All)"] + unique_metros
-else:
-    all_metros = ["(All)"]
-
-if "grade" in df_all.columns:
-    grade_vals = sorted(df_all["grade"].dropna().unique().astype(int).tolist())
-    grade_vals = [g for g in grade_vals if g in [9, 10, 11, 12]]
-    all_grades = ["(All)"] + [str(g) for g in grade_vals]
-else:
-    all_grades = ["(All)"]
+@st.cache_data  # The option lists only depend on the CSV, so compute them once
+def get_filter_options(path: str) -> tuple:
+    """
+    Returns (all_leagues, all_metros, all_grades) for the three dropdowns, each
+    starting with "(All)". Categories are already deduped and sorted.
+    """
+    df = load_data(path)
+
+    if "Classification" in df.columns:
+        all_leagues = ["(All)"] + df["Classification"].cat.categories.tolist()
+    else:
+        all_leagues = ["(All)"]
+
+    if "Metro" in df.columns:
+        all_metros = ["(All)"] + df["Metro"].cat.categories.tolist()
+    else:
+        all_metros = ["(All)"]
+
+    # Only the grades (9–12) that actually occur in the file
+    if "grade" in df.columns:
+        present = set(df["grade"].dropna().unique().tolist())
+        all_grades = ["(All)"] + [str(g) for g in FILTER_GRADES if g in present]
+    else:
+        all_grades = ["(All)"]
+
+    return all_leagues, all_metros, all_grades
+
+
+all_leagues, all_metros, all_grades = get_filter_options(DATA_PATH)
 
 col1, col2, col3 = st.columns([3, 3, 2], gap="large")
 with col1:
@@ -316,167 +242,251 @@ st.markdown("---")
 # -------------------------------------------------------
 # 5) APPLY FILTERS
 # -------------------------------------------------------
-dff = df_all.copy()
+def filter_mask(df: pd.DataFrame, league: str, metro: str, grade: str) -> np.ndarray:
+    """
+    Returns a boolean array marking the rows of `df` that match the three dropdowns
+    ("(All)" means no filter). The conditions are AND-ed into one mask.
+    """
+    mask = np.ones(len(df), dtype=bool)
 
-if selected_league != "(All)" and "Classification" in dff.columns:
-    dff = dff[dff["Classification"] == selected_league]
+    if league != "(All)" and "Classification" in df.columns:
+        mask &= df["Classification"].eq(league).to_numpy(dtype=bool, na_value=False)
 
-if selected_metro != "(All)" and "Metro" in dff.columns:
-    dff = dff[dff["Metro"] == selected_metro]
+    if metro != "(All)" and "Metro" in df.columns:
+        mask &= df["Metro"].eq(metro).to_numpy(dtype=bool, na_value=False)
+
+    # Grade options are always "(All)" or one of FILTER_GRADES as a string
+    if grade != "(All)" and "grade" in df.columns:
+        mask &= df["grade"].eq(int(grade)).to_numpy(dtype=bool, na_value=False)
+
+    return mask
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def get_filter_mask(league: str, metro: str, grade: str) -> np.ndarray:
+    """
+    filter_mask() over load_data(DATA_PATH), cached per filter combination so the
+    P4P table, the weight options and every weight view share one computation.
+    """
+    return filter_mask(load_data(DATA_PATH), league, metro, grade)
 
-if selected_grade != "(All)" and "grade" in dff.columns:
-    try:
-        grade_int = int(selected_grade)
-        dff = dff[dff["grade"] == grade_int]
-    except ValueError:
-        pass
+
+def apply_filters(league: str, metro: str, grade: str) -> pd.DataFrame:
+    """
+    Returns the rows of load_data(DATA_PATH) matching the three dropdowns, indexing
+    the frame once. With no filter active, the shared frame itself is returned
+    (callers only read it).
+    """
+    df = load_data(DATA_PATH)
+    if league == metro == grade == "(All)":
+        return df
+    return df.loc[get_filter_mask(league, metro, grade)]
+
+
+@st.cache_data
+def get_weight_index(path: str) -> dict:
+    """
+    Returns {weight: row positions in load_data(path)}, each already in the weight
+    tab's display order (by rank, or by Win_Pct if there is no rank column), so a
+    weight class can be pulled out sorted with one .iloc.
+    """
+    df = load_data(path)
+    if "rank" in df.columns:
+        ordered = df.sort_values("rank", kind="stable")
+    else:
+        ordered = df.sort_values("Win_Pct", ascending=False, kind="stable")
+    positions = ordered.index.to_numpy()  # load_data() returns a RangeIndex
+    groups = ordered.groupby("weight", observed=True).indices
+    return {w: positions[idx] for w, idx in groups.items()}
 
 
 # -------------------------------------------------------
 # 6) TABS: Pound-for-Pound vs. By Weight Class
 # -------------------------------------------------------
+def _to_float(s: pd.Series) -> np.ndarray:
+    """Returns `s` as a float64 ndarray, with missing values as NaN."""
+    return s.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+# Score and percentages stay numeric (compact over the wire, sortable in the
+# browser); st.dataframe formats them. Zero-match percentages show as blank.
+SCORE_COLUMN = st.column_config.NumberColumn("FloWrestling Score", format="%.2f")
+PCT_FORMAT = "%.1f%%"
+P4P_COLUMN_CONFIG = {"FloWrestling Score": SCORE_COLUMN}
+WEIGHT_COLUMN_CONFIG = {
+    "FloWrestling Score": SCORE_COLUMN,
+    "Win %": st.column_config.NumberColumn("Win %", format=PCT_FORMAT),
+    "Bonus Pt %": st.column_config.NumberColumn("Bonus Pt %", format=PCT_FORMAT),
+}
+
+# Rows the P4P tab sends until the user asks for the full list
+P4P_TOP_N = 200
+
+# Source column -> display header, in display order, for each tab (after the rank)
+P4P_DISPLAY_COLUMNS = {
+    "global_score": "FloWrestling Score",
+    "weight": "Weight",
+    "wrestler_name": "Wrestler Name",
+    "team_name": "Team Name",
+    "grade": "Grade",
+}
+WEIGHT_DISPLAY_COLUMNS = {
+    "global_score": "FloWrestling Score",
+    "wrestler_name": "Wrestler Name",
+    "team_name": "Team Name",
+    "grade": "Grade",
+    "Wins": "Wins",
+    "Losses": "Losses",
+    "Win_Pct": "Win %",
+    "Bonus_Pct": "Bonus Pt %",
+    "Pins": "Pins",
+    "Tech_Falls": "Tech Falls",
+    "Major_Decisions": "Major Decisions",
+}
+# 0–1 fractions shown as 0–100 percentages
+PCT_SOURCE_COLUMNS = ("Win_Pct", "Bonus_Pct")
+
+
+def _build_table(df: pd.DataFrame, rank_header: str, columns: dict) -> pd.DataFrame:
+    """
+    Builds a display table straight from `df`'s column arrays: a 1..n rank column,
+    then each source column in `columns` (that exists) under its display header.
+    """
+    out = {rank_header: np.arange(1, len(df) + 1, dtype=np.int32)}
+    for col, header in columns.items():
+        if col not in df.columns:
+            continue
+        if col == "global_score":
+            out[header] = _to_float(df[col])
+        elif col in PCT_SOURCE_COLUMNS:
+            out[header] = _to_float(df[col]) * 100
+        else:
+            out[header] = df[col].array
+    return pd.DataFrame(out)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def build_p4p(league: str, metro: str, grade: str) -> pd.DataFrame:
+    """
+    Builds the display table for the Pound-for-Pound tab: the filtered rows (already
+    sorted by global_score in load_data), with a P4P Rank and the score as
+    "FloWrestling Score". Cached per filter combination, so tab switches and radio
+    clicks reuse it.
+    """
+    df_p4p = apply_filters(league, metro, grade)
+    return _build_table(df_p4p, "P4P Rank", P4P_DISPLAY_COLUMNS)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def get_weight_options(league: str, metro: str, grade: str) -> list:
+    """
+    Returns the weight classes (ascending) that still have wrestlers after filtering,
+    for the weight radio. Cached per filter combination.
+    """
+    dff = apply_filters(league, metro, grade)
+    # Ordered categories of the weights still present after filtering
+    return dff["weight"].cat.remove_unused_categories().cat.categories.tolist()
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def build_weight_view(league: str, metro: str, grade: str, weight) -> pd.DataFrame:
+    """
+    Builds the display table for one weight class on the By Weight Class tab
+    (empty if nobody at that weight matches the filters).
+    Cached per filter combination + weight.
+    """
+    df = load_data(DATA_PATH)
+    rows = get_weight_index(DATA_PATH).get(weight, np.empty(0, dtype=np.intp))
+    # Positions come pre-sorted by get_weight_index(), so no sort is needed here
+    df_w = df.iloc[rows[get_filter_mask(league, metro, grade)[rows]]]
+    return _build_table(df_w, "Rank", WEIGHT_DISPLAY_COLUMNS)
+
+
 tab1, tab2 = st.tabs(["🏅 Pound-for-Pound Rankings", "⚖️ By Weight Class"])
 
 
 # ---------------------
 # 6-A) POUND-FOR-POUND TAB
 # ---------------------
+@st.fragment
+def p4p_section(league: str, metro: str, grade: str) -> None:
+    """
+    Renders the P4P table: the top P4P_TOP_N rows, or every row once "Show all"
+    is ticked. Runs as a fragment, so the checkbox only reruns this function.
+    """
+    display_p4p = build_p4p(league, metro, grade)
+    if len(display_p4p) > P4P_TOP_N:
+        show_all = st.checkbox(
+            f"Show all {len(display_p4p)} wrestlers (top {P4P_TOP_N} shown)",
+            key="p4p_show_all",
+        )
+        if not show_all:
+            display_p4p = display_p4p.head(P4P_TOP_N)
+    st.dataframe(
+        display_p4p,
+        use_container_width=True,
+        hide_index=True,
+        column_config=P4P_COLUMN_CONFIG,
+    )
+
+
 with tab1:
     st.markdown("### Pound-for-Pound Rankings")
-    if dff.shape[0] == 0:
+    if build_p4p(selected_league, selected_metro, selected_grade).shape[0] == 0:
         st.write("No data available for the current filters.")
     else:
-        df_p4p = (
-            dff.copy()
-               .sort_values(by="global_score", ascending=False)
-               .reset_index(drop=True)
-        )
-        df_p4p["P4P Rank"] = df_p4p.index + 1
-        df_p4p["FloWrestling Score"] = df_p4p["global_score"].apply(lambda x: f"{x:.2f}")
-
-        display_p4p = df_p4p[
-            [
-                "P4P Rank",
-                "FloWrestling Score",
-                "weight",
-                "wrestler_name",
-                "team_name",
-                "grade",
-            ]
-        ].copy()
-
-        display_p4p = display_p4p.rename(
-            columns={
-                "weight": "Weight",
-                "wrestler_name": "Wrestler Name",
-                "team_name": "Team Name",
-                "grade": "Grade",
-            }
-        )
-        display_p4p["Grade"] = display_p4p["Grade"].astype(int)
-
-        st.dataframe(display_p4p, use_container_width=True, hide_index=True)
+        p4p_section(selected_league, selected_metro, selected_grade)
 
 
 # ---------------------
 # 6-B) BY WEIGHT CLASS TAB
 # ---------------------
+@st.fragment
+def weight_class_section(league: str, metro: str, grade: str, weight_list: list) -> None:
+    """
+    Renders the weight-class radio and its table. Runs as a fragment, so clicking
+    a weight reruns only this function instead of the whole script.
+    """
+    selected_weight = st.radio(
+        label="Select Weight Class:",
+        options=weight_list,
+        index=0,
+        horizontal=True,
+        key="weight_radio",
+    )
+    df_display = build_weight_view(league, metro, grade, selected_weight)
+    if df_display.shape[0] == 0:
+        st.write(f"No wrestlers found at {selected_weight} for the current filters.")
+    else:
+        st.dataframe(
+            df_display,
+            use_container_width=True,
+            hide_index=True,
+            column_config=WEIGHT_COLUMN_CONFIG,
+        )
+
+
 with tab2:
     st.markdown("### By Weight Class")
-    if "weight" not in dff.columns:
+    if "weight" not in df_all.columns:
         st.error("❗️ Your data must include a column named “weight” (the weight class).")
     else:
-        weight_list = sorted(dff["weight"].dropna().unique().tolist())
+        weight_list = get_weight_options(selected_league, selected_metro, selected_grade)
         if len(weight_list) == 0:
             st.write("No weight-class data available for the current filters.")
         else:
-            selected_weight = st.radio(
-                label="Select Weight Class:",
-                options=weight_list,
-                index=0,
-                horizontal=True,
-                key="weight_radio",
-            )
-            df_w = dff[dff["weight"] == selected_weight].copy()
-            if df_w.shape[0] == 0:
-                st.write(f"No wrestlers found at {selected_weight} for the current filters.")
-            else:
-                if "rank" in df_w.columns:
-                    df_w = df_w.sort_values(by="rank", ascending=True).reset_index(drop=True)
-                else:
-                    if "Win_Pct" in df_w.columns:
-                        df_w = df_w.sort_values(by="Win_Pct", ascending=False).reset_index(drop=True)
-                    else:
-                        df_w = df_w.sort_values(by="global_score", ascending=False).reset_index(drop=True)
-
-                df_w["Rank"] = df_w.index + 1
-                df_w["FloWrestling Score"] = df_w["global_score"].apply(lambda x: f"{x:.2f}")
-
-                drop_cols = ["Classification", "Metro", "rank"]
-                df_display = df_w.drop(columns=drop_cols, errors="ignore").copy()
-
-                if "Win_Pct" in df_w.columns:
-                    df_display["Win %"] = df_w["Win_Pct"].apply(
-                        lambda x: f"{x * 100:.1f}%" if pd.notnull(x) else "—"
-                    )
-                else:
-                    def _calc_win_pct(r):
-                        total = r["Wins"] + r["Losses"]
-                        if total == 0:
-                            return "—"
-                        return f"{r['Wins'] / total * 100:.1f}%"
-                    df_display["Win %"] = df_w.apply(_calc_win_pct, axis=1)
-
-                def _calc_bonus_pct(r):
-                    total_matches = r["Wins"] + r["Losses"]
-                    if total_matches == 0:
-                        return "—"
-                    bonus_pts = r["Pins"] + r["Tech_Falls"] + r["Major_Decisions"]
-                    return f"{bonus_pts / total_matches * 100:.1f}%"
-                df_display["Bonus Pt %"] = df_w.apply(_calc_bonus_pct, axis=1)
-
-                desired_order = [
-                    "Rank",
-                    "FloWrestling Score",
-                    "wrestler_name",
-                    "team_name",
-                    "grade",
-                    "Wins",
-                    "Losses",
-                    "Win %",
-                    "Bonus Pt %",
-                    "Pins",
-                    "Tech_Falls",
-                    "Major_Decisions",
-                ]
-                cols_to_show = [c for c in desired_order if c in df_display.columns]
-                df_display = df_display[cols_to_show]
-                df_display = df_display.rename(
-                    columns={
-                        "wrestler_name": "Wrestler Name",
-                        "team_name": "Team Name",
-                        "grade": "Grade",
-                        "Tech_Falls": "Tech Falls",
-                        "Major_Decisions": "Major Decisions",
-                    }
-                )
-                if "Grade" in df_display.columns:
-                    df_display["Grade"] = df_display["Grade"].astype(int)
-
-                st.dataframe(df_display, use_container_width=True, hide_index=True)
+            weight_class_section(selected_league, selected_metro, selected_grade, weight_list)
 
 
 # -------------------------------------------------------
 # 7) OPTIONAL FOOTER / DEPLOY LINK
 # -------------------------------------------------------
-st.markdown(
-    """
+_FOOTER_HTML = """
     <div style="text-align:right; margin-top: 1rem;">
       <a href="https://share.streamlit.io/your-username/your-repo-name/main/streamlit_app.py" target="_blank">
         <img src="https://static.streamlit.io/badges/streamlit_badge_black_white.svg" 
              alt="Streamlit" style="height:32px;">
       </a>
     </div>
-    """,
-    unsafe_allow_html=True,
-)
+    """
+st.markdown(_FOOTER_HTML, unsafe_allow_html=True)